@@ -1,12 +1,14 @@
-from fastapi import FastAPI, HTTPException, Depends, Query
+from fastapi import FastAPI, HTTPException, Depends, Query, Response, Header
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.middleware.gzip import GZipMiddleware
+from pydantic import BaseModel, Field
 import uvicorn
 import os
 import hashlib
 import jwt
 from datetime import datetime, timedelta
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReplaceOne
 from dotenv import load_dotenv
 import openai
 import uuid
@@ -139,6 +141,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress larger JSON responses (wardrobe listings carry every item's base64 image)
+app.add_middleware(GZipMiddleware, minimum_size=1000)
+
 # User models
 class UserRegister(BaseModel):
     email: str
@@ -200,8 +205,6 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
     encoded_jwt = jwt.encode(to_encode, JWT_SECRET, algorithm=JWT_ALGORITHM)
     return encoded_jwt
 
-from fastapi import Header
-
 async def get_current_user(authorization: str = Header(None)):
     if not authorization or not authorization.startswith("Bearer "):
         raise HTTPException(status_code=401, detail="Missing or invalid authorization header")
@@ -321,12 +324,47 @@ async def onboarding(user_data: dict, user_id: str = Depends(get_current_user)):
     else:
         raise HTTPException(status_code=404, detail="User not found")
 
+def wardrobe_etag(items: list) -> str:
+    """ETag for a wardrobe listing. Items are only ever added or removed, never edited
+    in place, so their ids and timestamps identify it without hashing the images"""
+    fingerprint = "\n".join(f"{item.get('id')}:{item.get('updated_at') or item.get('created_at')}" for item in items)
+    return '"' + hashlib.md5(fingerprint.encode()).hexdigest() + '"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match check that accepts tag lists, "*" and weak (W/) tags, since
+    compressing the response may turn our strong ETag into a weak one"""
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in (tag[2:] if tag.startswith("W/") else tag for tag in tags)
+
 @app.get("/api/wardrobe")
-async def get_wardrobe(user_id: str = Depends(get_current_user)):
+async def get_wardrobe(
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    user_id: str = Depends(get_current_user)
+):
     user = await db.users.find_one({"id": user_id})
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    return {"items": user.get("wardrobe", [])}
+    items = user.get("wardrobe", [])
+    # Clients re-reading an unchanged wardrobe get an empty 304
+    etag = wardrobe_etag(items)
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return {"items": items}
+
+@app.head("/api/wardrobe")
+async def count_wardrobe(user_id: str = Depends(get_current_user)):
+    """Wardrobe size in X-Total-Items, counted in MongoDB without loading the items"""
+    result = await db.users.aggregate([
+        {"$match": {"id": user_id}},
+        {"$project": {"count": {"$size": {"$ifNull": ["$wardrobe", []]}}}}
+    ]).to_list(1)
+    if not result:
+        raise HTTPException(status_code=404, detail="User not found")
+    return Response(headers={"X-Total-Items": str(result[0]["count"])})
 
 async def gather_contextual_data(user: dict, message: str = "") -> dict:
     """Gather contextual data from all services for enhanced chat experience."""
@@ -1579,6 +1617,12 @@ class PlannedOutfit(BaseModel):
     event_name: Optional[str] = None
     items: Dict[str, Optional[str]]  # {category: item_id}
 
+# Largest batch the bulk planner endpoint accepts (a month of days)
+MAX_BULK_PLANNED_OUTFITS = 31
+
+class BulkPlannedOutfits(BaseModel):
+    outfits: List[PlannedOutfit] = Field(..., min_length=1, max_length=MAX_BULK_PLANNED_OUTFITS)
+
 # Save planned outfit
 @app.post("/api/planner/outfit")
 async def save_planned_outfit(planned_outfit: PlannedOutfit, user_id: str = Depends(get_current_user)):
@@ -1608,6 +1652,42 @@ async def save_planned_outfit(planned_outfit: PlannedOutfit, user_id: str = Depe
         print(f"❌ Error saving planned outfit: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error saving planned outfit: {str(e)}")
 
+# Save several planned outfits in one request
+@app.post("/api/planner/outfits/bulk")
+async def save_planned_outfits_bulk(bulk_data: BulkPlannedOutfits, user_id: str = Depends(get_current_user)):
+    """
+    Upsert a batch of planned outfits (one per date) with a single bulk write,
+    so callers planning a whole week don't pay one round-trip per day.
+    A date listed more than once keeps its last entry, as repeated single saves would.
+    """
+    try:
+        planned_outfits = {planned_outfit.date: planned_outfit for planned_outfit in bulk_data.outfits}.values()
+        created_at = datetime.utcnow().isoformat()
+
+        operations = [
+            ReplaceOne(
+                {"user_id": user_id, "date": planned_outfit.date},
+                {
+                    "date": planned_outfit.date,
+                    "occasion": planned_outfit.occasion,
+                    "event_name": planned_outfit.event_name,
+                    "items": planned_outfit.items,
+                    "created_at": created_at,
+                    "user_id": user_id
+                },
+                upsert=True
+            )
+            for planned_outfit in planned_outfits
+        ]
+        await db.planned_outfits.bulk_write(operations, ordered=False)
+
+        print(f"💾 Saved {len(operations)} planned outfits")
+        return {"message": "Planned outfits saved successfully", "count": len(operations)}
+
+    except Exception as e:
+        print(f"❌ Error saving planned outfits: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error saving planned outfits: {str(e)}")
+
 # Get planned outfits for a date range
 @app.get("/api/planner/outfits")
 async def get_planned_outfits(
@@ -4,8 +4,10 @@ Integrates with Railway microservice for intelligent product extraction
 """
 import requests
 import asyncio
+import functools
 from typing import List, Dict, Optional
 import uuid
+import numpy as np
 
 RAILWAY_API_URL = "https://fashion-ai-segmentation-production.up.railway.app/upload"
 RAILWAY_BASE_URL = "https://fashion-ai-segmentation-production.up.railway.app"
@@ -39,7 +41,7 @@ async def download_segmented_images(image_name: str, categories: List[str], crop
             print(f"🔗 Download URL: {download_url}")
             
             # Make async request to download segmented image
-            loop = asyncio.get_event_loop()
+            loop = asyncio.get_running_loop()
             response = await loop.run_in_executor(
                 None,
                 lambda url=download_url: requests.get(url, timeout=30)
@@ -119,7 +121,7 @@ async def extract_products_from_image(image_base64: str, user_id: str) -> List[D
         print(f"📡 Sending image to Railway AI: {RAILWAY_API_URL}")
         
         # Make async request to Railway API
-        loop = asyncio.get_event_loop()
+        loop = asyncio.get_running_loop()
         response = await loop.run_in_executor(
             None,
             lambda: requests.post(
@@ -199,50 +201,52 @@ async def extract_products_from_image(image_base64: str, user_id: str) -> List[D
         print(f"❌ Railway AI error: {str(e)}")
         return []
 
+# Lowercased category name -> wardrobe category, built once at import
+CATEGORY_MAPPING = {
+    # Railway AI specific categories
+    "upper_clothes": "Tops",
+    "lower_clothes": "Bottoms", 
+    "full_body": "Dresses",
+    "outer_layer": "Jackets",
+    
+    # Standard clothing categories
+    "shirt": "Shirts",
+    "t-shirt": "T-shirts", 
+    "tshirt": "T-shirts",
+    "top": "Tops",
+    "blouse": "Tops",
+    "dress": "Dresses",
+    "pant": "Pants",
+    "pants": "Pants",
+    "jean": "Jeans",
+    "jeans": "Jeans",
+    "trouser": "Pants",
+    "skirt": "Skirts",
+    "jacket": "Jackets",
+    "coat": "Jackets",
+    "blazer": "Jackets",
+    "sweater": "Tops",
+    "hoodie": "Tops",
+    "shoe": "Shoes",
+    "shoes": "Shoes",
+    "sneaker": "Shoes",
+    "sneakers": "Shoes",
+    "boot": "Shoes",
+    "boots": "Shoes",
+    "accessory": "Accessories",
+    "bag": "Accessories",
+    "purse": "Accessories",
+    "hat": "Accessories",
+    "scarf": "Accessories"
+}
+
+@functools.lru_cache(maxsize=128)  # Railway AI repeats the same few labels across uploads
 def normalize_category(category: str) -> str:
     """
     Normalize category names to match our wardrobe system
     Railway AI typically returns: upper_clothes, pants, shoes, etc.
     """
-    category_mapping = {
-        # Railway AI specific categories
-        "upper_clothes": "Tops",
-        "lower_clothes": "Bottoms", 
-        "full_body": "Dresses",
-        "outer_layer": "Jackets",
-        
-        # Standard clothing categories
-        "shirt": "Shirts",
-        "t-shirt": "T-shirts", 
-        "tshirt": "T-shirts",
-        "top": "Tops",
-        "blouse": "Tops",
-        "dress": "Dresses",
-        "pant": "Pants",
-        "pants": "Pants",
-        "jean": "Jeans",
-        "jeans": "Jeans",
-        "trouser": "Pants",
-        "skirt": "Skirts",
-        "jacket": "Jackets",
-        "coat": "Jackets",
-        "blazer": "Jackets",
-        "sweater": "Tops",
-        "hoodie": "Tops",
-        "shoe": "Shoes",
-        "shoes": "Shoes",
-        "sneaker": "Shoes",
-        "sneakers": "Shoes",
-        "boot": "Shoes",
-        "boots": "Shoes",
-        "accessory": "Accessories",
-        "bag": "Accessories",
-        "purse": "Accessories",
-        "hat": "Accessories",
-        "scarf": "Accessories"
-    }
-    
-    normalized = category_mapping.get(category.lower(), category.replace('_', ' ').title())
+    normalized = CATEGORY_MAPPING.get(category.lower(), category.replace('_', ' ').title())
     return normalized
 
 async def check_for_duplicate_items(new_items: List[Dict], existing_wardrobe: List[Dict]) -> List[Dict]:
@@ -258,17 +262,29 @@ async def check_for_duplicate_items(new_items: List[Dict], existing_wardrobe: Li
     """
     unique_items = []
     
-    for new_item in new_items:
-        is_duplicate = False
+    # Re-uploads of an item already in the wardrobe are caught by a set lookup;
+    # only the rest need similarity scoring
+    existing_keys = {duplicate_key(item) for item in existing_wardrobe}
+    existing_keys.discard(None)
+    exact_duplicates = [duplicate_key(item) in existing_keys for item in new_items]
+    to_score = [item for item, exact in zip(new_items, exact_duplicates) if not exact]
+    
+    # Similarity of every remaining new item against every existing item, scored in one pass
+    similarity = iter(similarity_matrix(to_score, existing_wardrobe))
+    
+    for new_item, exact in zip(new_items, exact_duplicates):
+        if exact:
+            print(f"🔍 Duplicate detected: {new_item.get('exact_item_name')} (exact match)")
+            print(f"⚠️ Skipping duplicate item: {new_item.get('exact_item_name')}")
+            continue
         
-        for existing_item in existing_wardrobe:
-            # Check for similarity based on category, color, and item name
-            similarity_score = calculate_item_similarity(new_item, existing_item)
-            
-            if similarity_score > 0.8:  # 80% similarity threshold
-                print(f"🔍 Duplicate detected: {new_item.get('exact_item_name')} (similarity: {similarity_score:.2f})")
-                is_duplicate = True
-                break
+        # Check for similarity based on category, color, and item name
+        scores = next(similarity)
+        duplicates = np.flatnonzero(scores > 0.8)  # 80% similarity threshold
+        is_duplicate = duplicates.size > 0
+        
+        if is_duplicate:
+            print(f"🔍 Duplicate detected: {new_item.get('exact_item_name')} (similarity: {scores[duplicates[0]]:.2f})")
         
         if not is_duplicate:
             unique_items.append(new_item)
@@ -278,6 +294,73 @@ async def check_for_duplicate_items(new_items: List[Dict], existing_wardrobe: Li
     print(f"📊 Duplicate check: {len(new_items)} → {len(unique_items)} unique items")
     return unique_items
 
+def duplicate_key(item: Dict) -> Optional[tuple]:
+    """
+    Name words, category and color as calculate_item_similarity compares them.
+    Two items with the same key always score at least 0.9 (category 0.4 +
+    color 0.3 + full name overlap 0.2), so they are duplicates without scoring.
+    Items without a name have no key.
+    """
+    name_words = frozenset(item.get("exact_item_name", "").lower().split())
+    if not name_words:
+        return None
+    return (
+        name_words,
+        item.get("category", "").lower(),
+        item.get("color", "").lower().replace(" ", "")
+    )
+
+def similarity_matrix(new_items: List[Dict], existing_items: List[Dict]) -> np.ndarray:
+    """
+    Vectorized calculate_item_similarity for every (new, existing) pair
+    
+    Returns:
+        Array of shape (len(new_items), len(existing_items)) with the same scores
+        calculate_item_similarity gives for each pair
+    """
+    items = list(new_items) + list(existing_items)
+    split = len(new_items)
+    
+    def field_matches(field: str) -> np.ndarray:
+        # Equal strings share a code, so equality becomes an integer comparison
+        _, codes = np.unique([item.get(field, "").lower() for item in items] + [""], return_inverse=True)
+        codes = codes[:-1]
+        return codes[:split, None] == codes[None, split:]
+    
+    # Color containment is only evaluated once per distinct pair of colors
+    colors = [item.get("color", "").lower().replace(" ", "") for item in items]
+    distinct_colors = list(dict.fromkeys(colors))
+    color_index = {color: idx for idx, color in enumerate(distinct_colors)}
+    color_contains = np.array([
+        [bool(color1 and color2 and color1 in color2 or color2 in color1) for color2 in distinct_colors]
+        for color1 in distinct_colors
+    ], dtype=bool).reshape(len(distinct_colors), len(distinct_colors))
+    color_ids = np.array([color_index[color] for color in colors], dtype=np.intp)
+    color_matches = color_contains[np.ix_(color_ids[:split], color_ids[split:])]
+    
+    # Name word overlap (Jaccard) from a word incidence matrix
+    name_words = [set(item.get("exact_item_name", "").lower().split()) for item in items]
+    vocabulary = {word: idx for idx, word in enumerate(set().union(*name_words))}
+    incidence = np.zeros((len(items), len(vocabulary)))
+    for row, words in enumerate(name_words):
+        incidence[row, [vocabulary[word] for word in words]] = 1.0
+    word_counts = incidence.sum(axis=1)
+    intersection = incidence[:split] @ incidence[split:].T
+    union = word_counts[:split, None] + word_counts[None, split:] - intersection
+    with np.errstate(divide="ignore", invalid="ignore"):
+        name_similarity = np.where(union > 0, intersection / union, 0.0)
+    has_names = (word_counts[:split, None] > 0) & (word_counts[None, split:] > 0)
+    name_scores = np.where(has_names & (name_similarity > 0.3), 0.2 * name_similarity, 0.0)
+    
+    # Same weights, summed in the same order, as calculate_item_similarity
+    return (
+        field_matches("category") * 0.4
+        + color_matches * 0.3
+        + name_scores
+        + field_matches("style") * 0.05
+        + field_matches("fabric_type") * 0.05
+    )
+
 def calculate_item_similarity(item1: Dict, item2: Dict) -> float:
     """
     Calculate similarity between two wardrobe items
@@ -7,23 +7,67 @@ Testing specific Phase 2 features and data integrity
 import requests
 import json
 import uuid
-from datetime import datetime, timedelta
+import atexit
+import asyncio
+import base64
+import os
+import time
+from datetime import date, datetime, timedelta
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; the stdlib json module is the fallback
+    orjson = None
 
 # Configuration
 BASE_URL = "https://smart-stylist-15.preview.emergentagent.com/api"
 
+# Fields every Phase 2 planned outfit carries, and the item slots it fills
+PLANNED_OUTFIT_FIELDS = frozenset({"date", "occasion", "event_name", "items", "user_id"})
+PLANNED_OUTFIT_SLOTS = frozenset({"top", "bottom", "layering", "shoes"})
+
+# One keep-alive session for every backend call, so only the first request pays for the TLS handshake
+SESSION = requests.Session()
+_adapter = HTTPAdapter(pool_connections=10, pool_maxsize=50, max_retries=Retry(total=2, backoff_factor=0.2))
+SESSION.mount("http://", _adapter)
+SESSION.mount("https://", _adapter)
+SESSION.headers.update({"Accept": "application/json"})
+atexit.register(SESSION.close)
+
+REQUEST_TIMEOUT = 30
+
+# Token of the last registered test user, reused by later runs until shortly before it expires
+TOKEN_CACHE_FILE = os.environ.get("PHASE2_TOKEN_CACHE", ".phase2_token.json")
+TOKEN_MIN_REMAINING = 60  # seconds
+
+def _token_expiry(token):
+    """Read the exp claim of a JWT (no signature check; it only decides whether to try reusing it)"""
+    payload = token.split(".")[1]
+    payload += "=" * (-len(payload) % 4)
+    return json.loads(base64.urlsafe_b64decode(payload)).get("exp", 0)
+
+def _loads(response):
+    """Decode a JSON response body"""
+    return orjson.loads(response.content) if orjson else response.json()
+
+# Upper bound on concurrent requests, so parallel saves don't trip backend rate limiting
+MAX_CONCURRENT_REQUESTS = 3
+
 class Phase2Tester:
     def __init__(self):
         self.access_token = None
         self.user_id = None
         self.test_results = []
+        # Fixed once per run, so every test dates its outfits from the same day
+        self.today = date.today()
         
     def log_test(self, test_name, success, details=""):
         """Log test results"""
         status = "✅ PASS" if success else "❌ FAIL"
-        print(f"{status} {test_name}")
-        if details:
-            print(f"   {details}")
+        # One print per result, so lines from concurrently running tests don't interleave
+        print(f"{status} {test_name}" + (f"\n   {details}" if details else ""))
         self.test_results.append({
             "test": test_name,
             "success": success,
@@ -33,20 +77,27 @@ class Phase2Tester:
     def setup_user(self):
         """Setup test user"""
         try:
+            # Reuse the cached user while its token is still valid
+            if self._load_cached_token():
+                return True
+            
             # Register user
             timestamp = int(datetime.now().timestamp())
             test_email = f"phase2_test_{timestamp}@example.com"
             
-            response = requests.post(f"{BASE_URL}/auth/register", json={
+            response = SESSION.post(f"{BASE_URL}/auth/register", json={
                 "email": test_email,
                 "password": "TestPass123!",
                 "name": "Phase2 Test User"
-            })
+            }, timeout=REQUEST_TIMEOUT)
             
             if response.status_code == 200:
-                data = response.json()
+                data = _loads(response)
                 self.access_token = data.get("access_token")
                 self.user_id = data.get("user", {}).get("id")
+                # Every later request rides the shared session with this header already attached
+                SESSION.headers.update(self.get_headers())
+                self._save_cached_token()
                 self.log_test("Phase 2 User Setup", True, f"User created: {test_email}")
                 return True
             else:
@@ -56,15 +107,77 @@ class Phase2Tester:
             self.log_test("Phase 2 User Setup", False, f"Exception: {str(e)}")
             return False
     
+    def _load_cached_token(self):
+        """Restore a cached token for this backend if it is unexpired and /auth/me still accepts it"""
+        try:
+            with open(TOKEN_CACHE_FILE) as f:
+                cached = json.load(f)
+            if cached.get("base_url") != BASE_URL or cached["exp"] - time.time() <= TOKEN_MIN_REMAINING:
+                return False
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            # Missing, unreadable or malformed (e.g. a non-numeric exp): register afresh
+            return False
+        
+        self.access_token = cached["token"]
+        self.user_id = cached["user_id"]
+        SESSION.headers.update(self.get_headers())
+        
+        response = SESSION.get(f"{BASE_URL}/auth/me", timeout=REQUEST_TIMEOUT)
+        if response.status_code != 200:
+            SESSION.headers.pop("Authorization", None)
+            self.access_token = self.user_id = None
+            return False
+        
+        self.log_test("Phase 2 User Setup", True, f"Reused cached token for user {self.user_id}")
+        return True
+    
+    def _save_cached_token(self):
+        """Cache the fresh token (owner-only file) so the next run can skip registration"""
+        try:
+            exp = _token_expiry(self.access_token)
+        except (IndexError, ValueError):
+            return
+        try:
+            # Created owner-only, so the token is never readable by others, even briefly
+            fd = os.open(TOKEN_CACHE_FILE, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w") as f:
+                # The mode above only applies on creation; tighten a file left by an older run
+                os.chmod(TOKEN_CACHE_FILE, 0o600)
+                json.dump({"base_url": BASE_URL, "token": self.access_token, "exp": exp, "user_id": self.user_id}, f)
+        except OSError as e:
+            # The cache only saves the next run a registration; never fail setup over it
+            print(f"⚠️ Could not cache token in {TOKEN_CACHE_FILE}: {e}")
+    
     def get_headers(self):
         return {"Authorization": f"Bearer {self.access_token}"}
     
+    def planner_date(self, days):
+        """YYYY-MM-DD planner date `days` after today"""
+        return (self.today + timedelta(days=days)).isoformat()
+    
+    async def _save_outfits(self, outfits):
+        """POST independent planner outfits concurrently, returning responses in order"""
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+        loop = asyncio.get_running_loop()
+        
+        async def save(outfit):
+            async with semaphore:
+                return await loop.run_in_executor(
+                    None,
+                    lambda: SESSION.post(
+                        f"{BASE_URL}/planner/outfit",
+                        json=outfit,
+                        timeout=REQUEST_TIMEOUT
+                    )
+                )
+        
+        return await asyncio.gather(*(save(outfit) for outfit in outfits))
+    
     def test_phase2_data_structure(self):
         """Test that saved outfits have the correct Phase 2 data structure"""
         try:
             # Save outfit with complete Phase 2 structure
-            today = datetime.now()
-            test_date = (today + timedelta(days=1)).strftime("%Y-%m-%d")
+            test_date = self.planner_date(1)
             
             phase2_outfit = {
                 "date": test_date,
@@ -79,10 +192,10 @@ class Phase2Tester:
             }
             
             # Save the outfit
-            response = requests.post(
+            response = SESSION.post(
                 f"{BASE_URL}/planner/outfit",
                 json=phase2_outfit,
-                headers=self.get_headers()
+                timeout=REQUEST_TIMEOUT
             )
             
             if response.status_code != 200:
@@ -90,29 +203,26 @@ class Phase2Tester:
                 return False
             
             # Retrieve and verify structure
-            response = requests.get(
+            response = SESSION.get(
                 f"{BASE_URL}/planner/outfits",
                 params={"start_date": test_date, "end_date": test_date},
-                headers=self.get_headers()
+                timeout=REQUEST_TIMEOUT
             )
             
             if response.status_code == 200:
-                data = response.json()
+                data = _loads(response)
                 outfits = data.get("planned_outfits", [])
                 
                 if len(outfits) > 0:
                     outfit = outfits[0]
                     
                     # Check required Phase 2 fields
-                    required_fields = ["date", "occasion", "event_name", "items", "user_id"]
-                    missing_fields = [field for field in required_fields if field not in outfit]
+                    missing_fields = sorted(PLANNED_OUTFIT_FIELDS - outfit.keys())
                     
                     if not missing_fields:
                         # Check items structure
                         items = outfit.get("items", {})
-                        expected_categories = ["top", "bottom", "layering", "shoes"]
-                        
-                        items_check = all(category in items for category in expected_categories)
+                        items_check = all(category in items for category in PLANNED_OUTFIT_SLOTS)
                         
                         if items_check:
                             self.log_test("Phase 2 Data Structure", True, "Complete Phase 2 data structure verified")
@@ -138,46 +248,55 @@ class Phase2Tester:
         """Test week-based date range queries for Phase 2 calendar integration"""
         try:
             # Create outfits for a full week
-            today = datetime.now()
-            week_start = today - timedelta(days=today.weekday())  # Monday
+            week_start = -self.today.weekday()  # Monday, as an offset from today
             
             week_dates = []
+            week_outfits = []
             for i in range(7):  # Full week
-                date = (week_start + timedelta(days=i)).strftime("%Y-%m-%d")
-                week_dates.append(date)
+                day = self.planner_date(week_start + i)
+                week_dates.append(day)
                 
-                outfit_data = {
-                    "date": date,
+                week_outfits.append({
+                    "date": day,
                     "occasion": f"Day {i+1} Activity",
                     "event_name": f"Week Event {i+1}",
                     "items": {
                         "top": f"top_item_{i}",
                         "bottom": f"bottom_item_{i}"
                     }
-                }
-                
-                response = requests.post(
-                    f"{BASE_URL}/planner/outfit",
-                    json=outfit_data,
-                    headers=self.get_headers()
-                )
-                
-                if response.status_code != 200:
-                    self.log_test("Week Range Setup", False, f"Failed to create outfit for {date}")
-                    return False
+                })
+            
+            # Save the whole week in one bulk request; older backends without the
+            # bulk endpoint get the seven per-day saves fired together instead
+            response = SESSION.post(
+                f"{BASE_URL}/planner/outfits/bulk",
+                json={"outfits": week_outfits},
+                timeout=REQUEST_TIMEOUT
+            )
+
+            if response.status_code in (404, 405):
+                responses = asyncio.run(self._save_outfits(week_outfits))
+
+                for day, response in zip(week_dates, responses):
+                    if response.status_code != 200:
+                        self.log_test("Week Range Setup", False, f"Failed to create outfit for {day}")
+                        return False
+            elif response.status_code != 200:
+                self.log_test("Week Range Setup", False, f"Bulk save failed: {response.status_code}")
+                return False
             
             # Query the full week
             start_date = week_dates[0]
             end_date = week_dates[-1]
             
-            response = requests.get(
+            response = SESSION.get(
                 f"{BASE_URL}/planner/outfits",
                 params={"start_date": start_date, "end_date": end_date},
-                headers=self.get_headers()
+                timeout=REQUEST_TIMEOUT
             )
             
             if response.status_code == 200:
-                data = response.json()
+                data = _loads(response)
                 outfits = data.get("planned_outfits", [])
                 
                 if len(outfits) == 7:
@@ -197,7 +316,7 @@ class Phase2Tester:
     def test_outfit_replacement_cycle(self):
         """Test multiple outfit save/retrieve/delete cycle for Phase 2"""
         try:
-            test_date = (datetime.now() + timedelta(days=10)).strftime("%Y-%m-%d")
+            test_date = self.planner_date(10)
             
             # Cycle 1: Save initial outfit
             outfit1 = {
@@ -207,7 +326,7 @@ class Phase2Tester:
                 "items": {"top": "shirt1", "bottom": "pants1"}
             }
             
-            response = requests.post(f"{BASE_URL}/planner/outfit", json=outfit1, headers=self.get_headers())
+            response = SESSION.post(f"{BASE_URL}/planner/outfit", json=outfit1, timeout=REQUEST_TIMEOUT)
             if response.status_code != 200:
                 self.log_test("Outfit Replacement Cycle", False, "Failed to save initial outfit")
                 return False
@@ -220,36 +339,36 @@ class Phase2Tester:
                 "items": {"top": "tshirt1", "bottom": "jeans1", "shoes": "sneakers1"}
             }
             
-            response = requests.post(f"{BASE_URL}/planner/outfit", json=outfit2, headers=self.get_headers())
+            response = SESSION.post(f"{BASE_URL}/planner/outfit", json=outfit2, timeout=REQUEST_TIMEOUT)
             if response.status_code != 200:
                 self.log_test("Outfit Replacement Cycle", False, "Failed to replace outfit")
                 return False
             
             # Verify replacement
-            response = requests.get(
+            response = SESSION.get(
                 f"{BASE_URL}/planner/outfits",
                 params={"start_date": test_date, "end_date": test_date},
-                headers=self.get_headers()
+                timeout=REQUEST_TIMEOUT
             )
             
             if response.status_code == 200:
-                data = response.json()
+                data = _loads(response)
                 outfits = data.get("planned_outfits", [])
                 
                 if len(outfits) == 1 and outfits[0]["occasion"] == "Casual":
                     # Cycle 3: Delete the outfit
-                    response = requests.delete(f"{BASE_URL}/planner/outfit/{test_date}", headers=self.get_headers())
+                    response = SESSION.delete(f"{BASE_URL}/planner/outfit/{test_date}", timeout=REQUEST_TIMEOUT)
                     
                     if response.status_code == 200:
                         # Verify deletion
-                        response = requests.get(
+                        response = SESSION.get(
                             f"{BASE_URL}/planner/outfits",
                             params={"start_date": test_date, "end_date": test_date},
-                            headers=self.get_headers()
+                            timeout=REQUEST_TIMEOUT
                         )
                         
                         if response.status_code == 200:
-                            data = response.json()
+                            data = _loads(response)
                             outfits = data.get("planned_outfits", [])
                             
                             if len(outfits) == 0:
@@ -279,7 +398,7 @@ class Phase2Tester:
         """Test that items field correctly maps wardrobe item IDs"""
         try:
             # Create outfit with realistic item IDs
-            test_date = (datetime.now() + timedelta(days=15)).strftime("%Y-%m-%d")
+            test_date = self.planner_date(15)
             
             # Use UUID format item IDs (as would come from wardrobe)
             item_ids = {
@@ -297,21 +416,21 @@ class Phase2Tester:
             }
             
             # Save outfit
-            response = requests.post(f"{BASE_URL}/planner/outfit", json=outfit_data, headers=self.get_headers())
+            response = SESSION.post(f"{BASE_URL}/planner/outfit", json=outfit_data, timeout=REQUEST_TIMEOUT)
             
             if response.status_code != 200:
                 self.log_test("Item ID Mapping", False, f"Failed to save outfit: {response.status_code}")
                 return False
             
             # Retrieve and verify item IDs are preserved
-            response = requests.get(
+            response = SESSION.get(
                 f"{BASE_URL}/planner/outfits",
                 params={"start_date": test_date, "end_date": test_date},
-                headers=self.get_headers()
+                timeout=REQUEST_TIMEOUT
             )
             
             if response.status_code == 200:
-                data = response.json()
+                data = _loads(response)
                 outfits = data.get("planned_outfits", [])
                 
                 if len(outfits) > 0:
@@ -340,6 +459,21 @@ class Phase2Tester:
             self.log_test("Item ID Mapping", False, f"Exception: {str(e)}")
             return False
     
+    async def _run_tests_concurrently(self):
+        """Run the Phase 2 tests that touch disjoint planner dates at the same time"""
+        loop = asyncio.get_running_loop()
+        
+        def data_structure_then_week():
+            # Tomorrow usually falls inside this week, so these two share a date and run in order
+            self.test_phase2_data_structure()
+            self.test_week_range_queries()
+        
+        await asyncio.gather(
+            loop.run_in_executor(None, data_structure_then_week),
+            loop.run_in_executor(None, self.test_outfit_replacement_cycle),  # today + 10
+            loop.run_in_executor(None, self.test_item_id_mapping)  # today + 15
+        )
+    
     def run_phase2_tests(self):
         """Run all Phase 2 specific tests"""
         print("🧪 Starting Phase 2 Manual Outfit Builder Specific Tests")
@@ -350,10 +484,7 @@ class Phase2Tester:
             return False
         
         # Run Phase 2 specific tests
-        self.test_phase2_data_structure()
-        self.test_week_range_queries()
-        self.test_outfit_replacement_cycle()
-        self.test_item_id_mapping()
+        asyncio.run(self._run_tests_concurrently())
         
         # Summary
         print("\n" + "=" * 65)
@@ -24,10 +24,24 @@ import asyncio
 import sys
 import os
 import time
+import functools
+import logging
+import re
 from datetime import datetime
 from io import BytesIO
-from PIL import Image, ImageDraw
 import uuid
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from urllib3.util.request import ACCEPT_ENCODING
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; the stdlib json module is the fallback
+    orjson = None
+
+# Full response dumps go to the debug log (LOG_LEVEL=DEBUG), formatted only when enabled
+logging.basicConfig(level=os.environ.get("LOG_LEVEL", "INFO"), format="%(message)s", stream=sys.stdout)
+logger = logging.getLogger(__name__)
 
 # Add backend to path for imports
 sys.path.append('/app/backend')
@@ -46,12 +60,117 @@ except:
 
 RAILWAY_AI_URL = "https://fashion-ai-segmentation-production.up.railway.app"
 
+# (connect, read) timeouts: an unreachable host fails within seconds instead of
+# holding every test for its full read timeout
+CONNECT_TIMEOUT = 3.05
+DEFAULT_READ_TIMEOUT = 30
+
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+def _dumps(payload):
+    """Serialize a request body straight to bytes"""
+    return orjson.dumps(payload) if orjson else json.dumps(payload).encode("utf-8")
+
+def _loads(response):
+    """Decode a JSON response body"""
+    return orjson.loads(response.content) if orjson else response.json()
+
+def _body_preview(response, limit: int = 512) -> str:
+    """Start of a response body for failure logs, without decoding (or charset-sniffing) all of it"""
+    return response.content[:limit].decode("utf-8", "replace")
+
+# Backend wording for an image with nothing to extract, matched case-insensitively
+_NO_CLOTHING_RE = re.compile(r"no clothing found", re.I)
+
+def _mentions(data: dict, pattern: re.Pattern) -> bool:
+    """Whether any top-level string value of a response matches pattern"""
+    return any(pattern.search(value) for value in data.values() if isinstance(value, str))
+
+def _keep_alive_session():
+    """Session with a pooled keep-alive adapter that retries dropped connections"""
+    session = requests.Session()
+    # Every codec urllib3 can decode here (gzip/deflate, plus br/zstd when installed)
+    session.headers["Accept-Encoding"] = ACCEPT_ENCODING
+    adapter = HTTPAdapter(pool_connections=10, pool_maxsize=20, max_retries=Retry(total=3, backoff_factor=0.3))
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+@functools.lru_cache(maxsize=1)
+def _fashion_image_jpeg() -> bytes:
+    """Draw and JPEG-encode the outfit test image once per run (it never changes between calls)"""
+    # PIL and numpy are only needed to draw this image, so they are imported on first use rather than with the module
+    from PIL import Image, ImageDraw
+    import numpy as np
+    
+    try:
+        # Create a more realistic outfit image with distinct clothing items
+        image = Image.new('RGB', (800, 1000), (240, 240, 240))  # Light gray background
+        draw = ImageDraw.Draw(image)
+        
+        # Draw upper clothing (shirt) - Blue
+        shirt_color = (70, 130, 180)  # Steel blue
+        draw.rectangle([200, 150, 600, 450], fill=shirt_color, outline=(50, 100, 150), width=4)
+        # Add collar
+        draw.rectangle([250, 170, 550, 220], fill=(100, 149, 237), outline=(50, 100, 150), width=2)
+        # Add buttons
+        for y in range(250, 400, 30):
+            draw.ellipse([390, y, 410, y+20], fill=(255, 255, 255), outline=(0, 0, 0), width=1)
+        
+        # Draw lower clothing (pants) - Dark blue
+        pants_color = (25, 25, 112)  # Midnight blue
+        draw.rectangle([220, 450, 580, 850], fill=pants_color, outline=(15, 15, 80), width=4)
+        # Add seam lines
+        draw.line([(300, 450), (300, 850)], fill=(35, 35, 122), width=2)
+        draw.line([(500, 450), (500, 850)], fill=(35, 35, 122), width=2)
+        
+        # Draw shoes - Black
+        draw.ellipse([200, 850, 350, 920], fill=(0, 0, 0), outline=(64, 64, 64), width=3)  # Left shoe
+        draw.ellipse([450, 850, 600, 920], fill=(0, 0, 0), outline=(64, 64, 64), width=3)  # Right shoe
+        
+        # Add some texture to make it more realistic: 1px horizontal lines, set as
+        # strided row slices of the pixel array rather than one draw.line call each
+        pixels = np.array(image)
+        pixels[170:430:20, 210:591] = (80, 140, 190)  # Shirt texture
+        pixels[470:830:25, 230:571] = (35, 35, 122)  # Pants texture
+        image = Image.fromarray(pixels)
+        
+        buffer = BytesIO()
+        image.save(buffer, format='JPEG', quality=90)
+        return buffer.getvalue()
+        
+    except Exception as e:
+        print(f"❌ Error creating realistic fashion image: {e}")
+        # Fallback to simple image
+        image = Image.new('RGB', (400, 400), (255, 0, 0))
+        buffer = BytesIO()
+        image.save(buffer, format='JPEG')
+        return buffer.getvalue()
+
+@functools.lru_cache(maxsize=1)
+def _build_fashion_image() -> str:
+    """Base64 form of the outfit test image, for JSON uploads"""
+    return base64.b64encode(_fashion_image_jpeg()).decode('utf-8')
+
+@functools.lru_cache(maxsize=1)
+def _fashion_image_data_uri() -> str:
+    """Data-URI form of the outfit test image, as the wardrobe endpoint receives it"""
+    return f"data:image/jpeg;base64,{_build_fashion_image()}"
+
 class FinalRailwayAITester:
     def __init__(self):
         self.test_results = []
         self.failed_tests = []
         self.access_token = None
         self.user_id = None
+        self._auth_headers = {}
+        # Backend calls carry the bearer token once logged in; Railway AI gets its own
+        # session so the token is never sent to a third-party host
+        self.session = _keep_alive_session()
+        self.railway_session = _keep_alive_session()
+        # Set once a host refuses connections or times out; later tests against it skip
+        self._backend_down = False
+        self._railway_down = False
         
         print(f"🧪 FINAL Railway AI Segmentation Tester - Filename Usage Fix")
         print(f"📡 Backend URL: {BACKEND_URL}")
@@ -71,7 +190,7 @@ class FinalRailwayAITester:
             "success": success,
             "details": details,
             "error": error,
-            "timestamp": datetime.now().isoformat()
+            "t_ns": time.monotonic_ns()
         })
         
         if not success:
@@ -79,54 +198,7 @@ class FinalRailwayAITester:
     
     def create_realistic_fashion_image(self) -> str:
         """Create a realistic fashion image that should trigger Railway AI segmentation"""
-        try:
-            # Create a more realistic outfit image with distinct clothing items
-            image = Image.new('RGB', (800, 1000), (240, 240, 240))  # Light gray background
-            draw = ImageDraw.Draw(image)
-            
-            # Draw upper clothing (shirt) - Blue
-            shirt_color = (70, 130, 180)  # Steel blue
-            draw.rectangle([200, 150, 600, 450], fill=shirt_color, outline=(50, 100, 150), width=4)
-            # Add collar
-            draw.rectangle([250, 170, 550, 220], fill=(100, 149, 237), outline=(50, 100, 150), width=2)
-            # Add buttons
-            for y in range(250, 400, 30):
-                draw.ellipse([390, y, 410, y+20], fill=(255, 255, 255), outline=(0, 0, 0), width=1)
-            
-            # Draw lower clothing (pants) - Dark blue
-            pants_color = (25, 25, 112)  # Midnight blue
-            draw.rectangle([220, 450, 580, 850], fill=pants_color, outline=(15, 15, 80), width=4)
-            # Add seam lines
-            draw.line([(300, 450), (300, 850)], fill=(35, 35, 122), width=2)
-            draw.line([(500, 450), (500, 850)], fill=(35, 35, 122), width=2)
-            
-            # Draw shoes - Black
-            draw.ellipse([200, 850, 350, 920], fill=(0, 0, 0), outline=(64, 64, 64), width=3)  # Left shoe
-            draw.ellipse([450, 850, 600, 920], fill=(0, 0, 0), outline=(64, 64, 64), width=3)  # Right shoe
-            
-            # Add some texture to make it more realistic
-            # Shirt texture
-            for y in range(170, 430, 20):
-                draw.line([(210, y), (590, y)], fill=(80, 140, 190), width=1)
-            
-            # Pants texture
-            for y in range(470, 830, 25):
-                draw.line([(230, y), (570, y)], fill=(35, 35, 122), width=1)
-            
-            # Convert to base64
-            buffer = BytesIO()
-            image.save(buffer, format='JPEG', quality=90)
-            image_bytes = buffer.getvalue()
-            
-            return base64.b64encode(image_bytes).decode('utf-8')
-            
-        except Exception as e:
-            print(f"❌ Error creating realistic fashion image: {e}")
-            # Fallback to simple image
-            image = Image.new('RGB', (400, 400), (255, 0, 0))
-            buffer = BytesIO()
-            image.save(buffer, format='JPEG')
-            return base64.b64encode(buffer.getvalue()).decode('utf-8')
+        return _build_fashion_image()
     
     async def setup_test_user(self):
         """Create a test user and get authentication token"""
@@ -139,17 +211,19 @@ class FinalRailwayAITester:
                 "name": "Final Railway Test User"
             }
             
-            response = requests.post(f"{BACKEND_URL}/auth/register", json=register_data)
+            response = await self._call(self.session.post, f"{BACKEND_URL}/auth/register", data=_dumps(register_data), headers=JSON_HEADERS)
             
             if response.status_code == 200:
-                data = response.json()
+                data = _loads(response)
                 self.access_token = data.get("access_token")
                 self.user_id = data.get("user", {}).get("id")
+                self._auth_headers = {"Authorization": f"Bearer {self.access_token}"}
+                self.session.headers.update(self._auth_headers)
                 
                 self.log_test("User Registration", True, f"Created user: {self.user_id}")
                 return True
             else:
-                self.log_test("User Registration", False, f"HTTP {response.status_code}: {response.text}")
+                self.log_test("User Registration", False, f"HTTP {response.status_code}: {_body_preview(response)}")
                 return False
                 
         except Exception as e:
@@ -157,17 +231,56 @@ class FinalRailwayAITester:
             return False
     
     def get_auth_headers(self):
-        """Get authorization headers for API requests"""
-        return {"Authorization": f"Bearer {self.access_token}"}
+        """Get authorization headers for API requests (built once at login; the backend session already sends them)"""
+        return self._auth_headers
+    
+    async def _call(self, method, *args, **kwargs):
+        """Run a blocking session call in the default executor so other tests keep going"""
+        kwargs.setdefault("timeout", (CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT))
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(None, lambda: method(*args, **kwargs))
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            if method.__self__ is self.railway_session:
+                self._railway_down = True
+            else:
+                self._backend_down = True
+            raise
+    
+    async def _wardrobe_count(self) -> int:
+        """Number of wardrobe items, from the HEAD endpoint's X-Total-Items header when available"""
+        response = await self._call(self.session.head, f"{BACKEND_URL}/wardrobe")
+        if response.status_code == 200 and "X-Total-Items" in response.headers:
+            return int(response.headers["X-Total-Items"])
+        
+        # Older backends: download the list just to count it
+        response = await self._call(self.session.get, f"{BACKEND_URL}/wardrobe")
+        if response.status_code == 200:
+            return len(_loads(response).get("items", []))
+        return 0
+    
+    async def _upload_wardrobe(self):
+        """Upload the outfit test image to the backend wardrobe endpoint"""
+        # /api/wardrobe only accepts a JSON body with the image as base64 (its whole
+        # pipeline, Railway AI included, works on base64), so there is no binary path
+        wardrobe_data = {
+            "image_base64": _fashion_image_data_uri()
+        }
+        return await self._call(
+            self.session.post,
+            f"{BACKEND_URL}/wardrobe",
+            data=_dumps(wardrobe_data),
+            headers=JSON_HEADERS,
+            timeout=(CONNECT_TIMEOUT, 120)  # Extended timeout for Railway AI processing
+        )
     
     async def test_filename_tracking(self):
         """Test 1: Verify unique filename generation and tracking"""
         try:
             print("\n📁 Testing Filename Tracking...")
             
-            # Create test image
-            test_image_b64 = self.create_realistic_fashion_image()
-            image_bytes = base64.b64decode(test_image_b64)
+            # Create test image (raw JPEG bytes, multipart needs no base64)
+            image_bytes = _fashion_image_jpeg()
             
             # Generate expected filename pattern: upload_{timestamp}_{user_id}
             timestamp = int(time.time())
@@ -178,23 +291,24 @@ class FinalRailwayAITester:
             
             # Prepare multipart form data with actual filename
             files = {
-                'file': (f'{expected_filename_pattern}.jpg', BytesIO(image_bytes), 'image/jpeg')
+                'file': (f'{expected_filename_pattern}.jpg', image_bytes, 'image/jpeg')
             }
             
             print(f"📡 Sending request to Railway AI with filename: {expected_filename_pattern}.jpg")
             
             # Make request to Railway AI directly to verify filename usage
-            response = requests.post(
+            response = await self._call(
+                self.railway_session.post,
                 f"{RAILWAY_AI_URL}/upload",
                 files=files,
-                timeout=90
+                timeout=(CONNECT_TIMEOUT, 90)
             )
             
             print(f"📊 Railway AI Response Status: {response.status_code}")
             
             if response.status_code == 200:
-                data = response.json()
-                print(f"📋 Railway AI Response: {json.dumps(data, indent=2)}")
+                data = _loads(response)
+                logger.debug("📋 Railway AI Response: %r", data)
                 
                 # Check if Railway AI received the correct filename
                 image_name = data.get("image_name", "")
@@ -223,7 +337,7 @@ class FinalRailwayAITester:
             elif response.status_code == 500:
                 # Check if it's the expected "no clothing found" response
                 try:
-                    error_data = response.json()
+                    error_data = _loads(response)
                     error_msg = error_data.get("detail", "").lower()
                     if "no clothing found" in error_msg or "failed to process" in error_msg:
                         self.log_test("Filename Tracking", True, "Railway AI correctly identified no clothing in test image")
@@ -232,10 +346,10 @@ class FinalRailwayAITester:
                         self.log_test("Filename Tracking", False, f"Unexpected 500 error: {error_msg}")
                         return None
                 except:
-                    self.log_test("Filename Tracking", False, f"HTTP 500: {response.text}")
+                    self.log_test("Filename Tracking", False, f"HTTP 500: {_body_preview(response)}")
                     return None
             else:
-                self.log_test("Filename Tracking", False, f"HTTP {response.status_code}: {response.text}")
+                self.log_test("Filename Tracking", False, f"HTTP {response.status_code}: {_body_preview(response)}")
                 return None
                 
         except Exception as e:
@@ -247,6 +361,10 @@ class FinalRailwayAITester:
         try:
             print("\n🖼️ Testing Segmented Image Download with Actual Filename...")
             
+            if self._railway_down:
+                self.log_test("Segmented Image Download", False, "Skipped - Railway AI unreachable")
+                return False
+            
             if not railway_data or railway_data.get("status") == "no_clothing":
                 self.log_test("Segmented Image Download", True, "Skipped - no clothing detected by Railway AI")
                 return True
@@ -260,14 +378,22 @@ class FinalRailwayAITester:
             download_success_count = 0
             download_failures = []
             
-            for idx, crop_path in enumerate(expected_crops[:3]):  # Test first 3 crops
-                download_url = f"{RAILWAY_AI_URL}/outputs/{crop_path}"
-                
+            crops_to_test = expected_crops[:3]  # Test first 3 crops
+            download_urls = [f"{RAILWAY_AI_URL}/outputs/{crop_path}" for crop_path in crops_to_test]
+            
+            # The crops are independent files, so fetch them all at once
+            responses = await asyncio.gather(
+                *(self._call(self.railway_session.get, download_url) for download_url in download_urls),
+                return_exceptions=True
+            )
+            
+            for idx, (crop_path, download_url, response) in enumerate(zip(crops_to_test, download_urls, responses)):
                 print(f"📥 Testing download {idx+1}: {crop_path}")
                 print(f"🔗 Download URL: {download_url}")
                 
                 try:
-                    response = requests.get(download_url, timeout=30)
+                    if isinstance(response, Exception):
+                        raise response
                     
                     if response.status_code == 200:
                         # Verify it's an image
@@ -287,7 +413,7 @@ class FinalRailwayAITester:
                             print(f"   ❌ Invalid content: type={content_type}, size={len(response.content)}")
                             download_failures.append(f"{crop_path}: Invalid content")
                     else:
-                        print(f"   ❌ HTTP {response.status_code}: {response.text[:100]}")
+                        print(f"   ❌ HTTP {response.status_code}: {_body_preview(response, 100)}")
                         download_failures.append(f"{crop_path}: HTTP {response.status_code}")
                         
                 except Exception as e:
@@ -317,38 +443,26 @@ class FinalRailwayAITester:
                 return False
             
             # Clear wardrobe first
-            requests.delete(f"{BACKEND_URL}/wardrobe/clear", headers=self.get_auth_headers())
+            clear_response = await self._call(self.session.delete, f"{BACKEND_URL}/wardrobe/clear")
             
-            # Get initial wardrobe count
-            response = requests.get(f"{BACKEND_URL}/wardrobe", headers=self.get_auth_headers())
-            if response.status_code == 200:
-                initial_count = len(response.json().get("items", []))
-            else:
+            # Get initial wardrobe count (a successful clear leaves it empty, no need to download it)
+            if clear_response.status_code == 200:
                 initial_count = 0
+            else:
+                initial_count = await self._wardrobe_count()
             
             print(f"📊 Initial wardrobe count: {initial_count}")
             
             # Upload realistic fashion image to wardrobe endpoint
-            test_image_b64 = self.create_realistic_fashion_image()
-            
-            wardrobe_data = {
-                "image_base64": f"data:image/jpeg;base64,{test_image_b64}"
-            }
-            
             print(f"📤 Uploading realistic fashion image to wardrobe endpoint...")
             
-            response = requests.post(
-                f"{BACKEND_URL}/wardrobe",
-                json=wardrobe_data,
-                headers=self.get_auth_headers(),
-                timeout=120  # Extended timeout for Railway AI processing
-            )
+            response = await self._upload_wardrobe()
             
             print(f"📊 Wardrobe Upload Response: {response.status_code}")
             
             if response.status_code == 200:
-                data = response.json()
-                print(f"📋 Wardrobe Response: {json.dumps(data, indent=2)}")
+                data = _loads(response)
+                logger.debug("📋 Wardrobe Response: %r", data)
                 
                 items_added = data.get("items_added", 0)
                 extraction_method = data.get("extraction_method", "unknown")
@@ -360,9 +474,9 @@ class FinalRailwayAITester:
                     self.log_test("Railway AI Integration", True, f"Added {items_added} items via Railway AI")
                     
                     # Verify items were actually added
-                    response = requests.get(f"{BACKEND_URL}/wardrobe", headers=self.get_auth_headers())
+                    response = await self._call(self.session.get, f"{BACKEND_URL}/wardrobe")
                     if response.status_code == 200:
-                        wardrobe_items = response.json().get("items", [])
+                        wardrobe_items = _loads(response).get("items", [])
                         final_count = len(wardrobe_items)
                         actual_added = final_count - initial_count
                         
@@ -373,6 +487,7 @@ class FinalRailwayAITester:
                             segmented_items = 0
                             individual_items = 0
                             full_outfit_items = 0
+                            item_lines = []
                             
                             for item in wardrobe_items:
                                 extraction_source = item.get("extraction_source", "")
@@ -387,7 +502,10 @@ class FinalRailwayAITester:
                                     full_outfit_items += 1
                                 
                                 # Log item details for debugging
-                                print(f"   Item: {item.get('exact_item_name')} | Category: {item.get('category')} | Source: {extraction_source}")
+                                item_lines.append(f"   Item: {item.get('exact_item_name')} | Category: {item.get('category')} | Source: {extraction_source}")
+                            
+                            if item_lines:
+                                print("\n".join(item_lines))
                             
                             # SUCCESS CRITERIA: Items should be individual clothing pieces, not full outfit
                             success = actual_added > 0 and full_outfit_items == 0
@@ -414,7 +532,7 @@ class FinalRailwayAITester:
                         self.log_test("Individual Wardrobe Items", False, "Failed to verify wardrobe items")
                         return False
                         
-                elif "no clothing found" in str(data).lower() or items_extracted == 0:
+                elif items_extracted == 0 or _mentions(data, _NO_CLOTHING_RE):
                     # Railway AI correctly identified no clothing - this is acceptable for test images
                     self.log_test("Individual Wardrobe Items", True, "Railway AI correctly identified no clothing in test image")
                     return True
@@ -423,7 +541,7 @@ class FinalRailwayAITester:
                     return False
                     
             else:
-                self.log_test("Individual Wardrobe Items", False, f"HTTP {response.status_code}: {response.text}")
+                self.log_test("Individual Wardrobe Items", False, f"HTTP {response.status_code}: {_body_preview(response)}")
                 return False
                 
         except Exception as e:
@@ -439,30 +557,22 @@ class FinalRailwayAITester:
                 self.log_test("End-to-End Success", False, "No authentication token")
                 return False
             
-            # Clear wardrobe first
-            requests.delete(f"{BACKEND_URL}/wardrobe/clear", headers=self.get_auth_headers())
-            
-            # Create a complex test image (simulating outfit with shirt + pants)
-            test_image_b64 = self.create_realistic_fashion_image()
+            if self._backend_down:
+                self.log_test("End-to-End Success", False, "Skipped - backend unreachable")
+                return False
             
-            # Upload to wardrobe
-            wardrobe_data = {
-                "image_base64": f"data:image/jpeg;base64,{test_image_b64}"
-            }
+            # Clear wardrobe first
+            await self._call(self.session.delete, f"{BACKEND_URL}/wardrobe/clear")
             
             print(f"🚀 Starting end-to-end success test...")
             print(f"   Expected: Upload outfit photo → Multiple individual clothing items in wardrobe")
             print(f"   Success criteria: Each wardrobe item shows cropped image of specific clothing piece")
             
-            response = requests.post(
-                f"{BACKEND_URL}/wardrobe",
-                json=wardrobe_data,
-                headers=self.get_auth_headers(),
-                timeout=120
-            )
+            # Upload a complex test image (simulating outfit with shirt + pants) to wardrobe
+            response = await self._upload_wardrobe()
             
             if response.status_code == 200:
-                data = response.json()
+                data = _loads(response)
                 
                 # Check if Railway AI was used and items were created
                 extraction_method = data.get("extraction_method", "")
@@ -474,10 +584,10 @@ class FinalRailwayAITester:
                 
                 if "railway_ai" in extraction_method and items_added > 0:
                     # Verify items in wardrobe
-                    wardrobe_response = requests.get(f"{BACKEND_URL}/wardrobe", headers=self.get_auth_headers())
+                    wardrobe_response = await self._call(self.session.get, f"{BACKEND_URL}/wardrobe")
                     
                     if wardrobe_response.status_code == 200:
-                        wardrobe_items = wardrobe_response.json().get("items", [])
+                        wardrobe_items = _loads(wardrobe_response).get("items", [])
                         
                         # CRITICAL SUCCESS CRITERIA:
                         # 1. Multiple items created (ideally 2+ for shirt + pants)
@@ -488,6 +598,7 @@ class FinalRailwayAITester:
                         individual_items = 0
                         full_outfit_items = 0
                         different_categories = set()
+                        item_lines = []
                         
                         for item in wardrobe_items:
                             extraction_source = item.get("extraction_source", "")
@@ -504,7 +615,10 @@ class FinalRailwayAITester:
                             if category:
                                 different_categories.add(category)
                             
-                            print(f"   📦 Item: {item.get('exact_item_name')} | Category: {category} | Source: {extraction_source}")
+                            item_lines.append(f"   📦 Item: {item.get('exact_item_name')} | Category: {category} | Source: {extraction_source}")
+                        
+                        if item_lines:
+                            print("\n".join(item_lines))
                         
                         # Success criteria evaluation
                         multiple_items = len(wardrobe_items) >= 1  # At least 1 item created
@@ -530,14 +644,14 @@ class FinalRailwayAITester:
                         return False
                 else:
                     # Check if Railway AI returned "no clothing found" - acceptable for test images
-                    if "no clothing found" in str(data).lower() or items_extracted == 0:
+                    if items_extracted == 0 or _mentions(data, _NO_CLOTHING_RE):
                         self.log_test("End-to-End Success", True, "Railway AI correctly identified no clothing in test image")
                         return True
                     else:
                         self.log_test("End-to-End Success", False, f"Railway AI not used or failed: {extraction_method}")
                         return False
             else:
-                self.log_test("End-to-End Success", False, f"HTTP {response.status_code}: {response.text}")
+                self.log_test("End-to-End Success", False, f"HTTP {response.status_code}: {_body_preview(response)}")
                 return False
                 
         except Exception as e:
@@ -556,17 +670,23 @@ class FinalRailwayAITester:
             print("❌ Failed to setup test user, aborting tests")
             return
         
-        # Test 1: Filename tracking and crop path generation
-        railway_data = await self.test_filename_tracking()
-        
-        # Test 2: Segmented image download using actual filename
-        await self.test_segmented_image_download(railway_data)
+        async def railway_tests():
+            # Test 1: Filename tracking and crop path generation
+            railway_data = await self.test_filename_tracking()
+            
+            # Test 2: Segmented image download using actual filename
+            await self.test_segmented_image_download(railway_data)
         
-        # Test 3: Individual wardrobe items creation
-        await self.test_individual_wardrobe_items()
+        async def wardrobe_tests():
+            # Test 3: Individual wardrobe items creation
+            await self.test_individual_wardrobe_items()
+            
+            # Test 4: End-to-end success scenario (clears the same wardrobe, so runs after test 3)
+            await self.test_end_to_end_success()
         
-        # Test 4: End-to-end success scenario
-        await self.test_end_to_end_success()
+        # The direct Railway AI tests never touch the backend wardrobe, so the two
+        # chains overlap their (long) inference round trips
+        await asyncio.gather(railway_tests(), wardrobe_tests())
         
         # Print summary
         print("\n" + "=" * 80)